@@ -1,22 +1,73 @@
-import boto3, os, re, logging, uuid, datetime, pytz, requests
-from functools import wraps
+import boto3, os, logging, datetime, threading, time, queue, json, atexit, tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps, cache, lru_cache
+from botocore.config import Config
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton, BotCommand, ParseMode
 from telegram.ext import Updater, CommandHandler, CallbackQueryHandler
 
 # --- Basic Configuration ---
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+                    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
+# The AWS SDK logs every request at INFO/DEBUG; keep it quiet even when LOG_LEVEL is lowered.
+for noisy_logger in ("boto3", "botocore", "s3transfer", "urllib3"):
+    logging.getLogger(noisy_logger).setLevel(logging.WARNING)
 
 # --- AWS & Bot Configuration ---
 REGION = os.getenv("AWS_REGION", "ap-south-1")
 DYNAMODB_TABLE_NAME = "TelegramBotAuditLog"  # Table for Audit Logs
 ADMIN_CHAT_ID = 8498983488  # IMPORTANT: Replace with your Telegram user ID
+POOL_RECYCLE_INTERVAL = int(os.getenv("POOL_RECYCLE_INTERVAL", "1800"))  # Seconds between idle-socket sweeps
+DISPATCHER_WORKERS = int(os.getenv("DISPATCHER_WORKERS", "16"))  # run_async threads; keep <= BOTO_MAX_POOL_CONNECTIONS
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Public HTTPS base URL; long-polling is used when unset
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))  # Local port behind the TLS-terminating proxy
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")  # Plain-HTTP bind address; keep it off public interfaces
+POLL_TIMEOUT = int(os.getenv("POLL_TIMEOUT", "50"))  # Seconds Telegram may hold a getUpdates request
 
 # --- AWS Clients ---
-ssm = boto3.client("ssm", region_name=REGION)
-ec2 = boto3.client("ec2", region_name=REGION)
-dynamodb = boto3.resource("dynamodb", region_name=REGION)
-audit_log_table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+# Shared HTTP settings: a larger keep-alive pool so concurrent handlers don't re-handshake TLS.
+BOTO_CONFIG = Config(
+    max_pool_connections=int(os.getenv("BOTO_MAX_POOL_CONNECTIONS", "50")),
+    tcp_keepalive=True,
+    retries={"max_attempts": 5, "mode": "adaptive"},
+    connect_timeout=3,
+    read_timeout=10,
+)
+
+# Clients are created on first use and then shared, one per region. Creation goes through
+# boto3's default session, which isn't thread-safe, so it is serialized.
+client_lock = threading.Lock()
+
+
+@cache
+def get_ssm(region=REGION):
+    # SSM is only hit at startup; fail fast if the endpoint is unreachable.
+    with client_lock:
+        return boto3.client("ssm", region_name=region,
+                            config=BOTO_CONFIG.merge(Config(connect_timeout=2, read_timeout=5)))
+
+
+@cache
+def get_ec2(region=REGION):
+    with client_lock:
+        return boto3.client("ec2", region_name=region, config=BOTO_CONFIG)
+
+
+@cache
+def get_pricing():
+    # The Pricing API is only served from a few regions; us-east-1 covers every region's prices.
+    with client_lock:
+        return boto3.client("pricing", region_name="us-east-1", config=BOTO_CONFIG)
+
+
+@cache
+def get_audit_log_table():
+    with client_lock:
+        return boto3.resource("dynamodb", region_name=REGION, config=BOTO_CONFIG).Table(DYNAMODB_TABLE_NAME)
+
+
+# Caps concurrent start/stop/reboot/terminate calls so button bursts don't trip EC2 API throttling.
+ec2_mutation_slots = threading.BoundedSemaphore(8)
 
 # --- Instance Price Map (for lightweight cost estimation) ---
 INSTANCE_PRICE_MAP = {
@@ -24,41 +75,287 @@ INSTANCE_PRICE_MAP = {
     "t3.micro": 0.0112, "t3.small": 0.0224, "t3.medium": 0.0448,
 }
 
+LIST_CHUNK_SIZE = 10  # Instances per /list message (two keyboard rows each)
+STATE_EMOJI = {"pending": "🟡", "running": "🟢", "stopping": "🟠", "stopped": "🔴"}
+
+
+# --- Live Pricing (falls back to INSTANCE_PRICE_MAP) ---
+# Kept in a private per-user directory: a fixed path under /tmp could be pre-planted or symlinked by other users.
+PRICE_CACHE_PATH = os.getenv("PRICE_CACHE_PATH",
+                             os.path.join(os.path.expanduser("~"), ".cache", "aws-manager-bot", "ec2_prices.json"))
+PRICE_CACHE_TTL = 86400  # Seconds; on-demand prices change rarely
+PRICE_RETRY_AFTER = 3600  # Seconds before retrying the Pricing API after a failure
+price_cache = {"prices": None, "loaded_at": 0.0}
+price_cache_lock = threading.Lock()
+
+
+def fetch_on_demand_prices():
+    """Returns {instance type: hourly USD} for Linux, shared-tenancy on-demand instances in REGION."""
+    filters = [
+        {"Type": "TERM_MATCH", "Field": field, "Value": value}
+        for field, value in (
+            ("regionCode", REGION), ("operatingSystem", "Linux"), ("tenancy", "Shared"),
+            ("preInstalledSw", "NA"), ("capacitystatus", "Used"), ("licenseModel", "No License required"),
+        )
+    ]
+    prices = {}
+    for page in get_pricing().get_paginator("get_products").paginate(ServiceCode="AmazonEC2", Filters=filters):
+        for raw in page["PriceList"]:
+            product = json.loads(raw)
+            itype = product["product"]["attributes"].get("instanceType")
+            for term in product.get("terms", {}).get("OnDemand", {}).values():
+                for dimension in term["priceDimensions"].values():
+                    usd = float(dimension["pricePerUnit"].get("USD", 0))
+                    if itype and usd:
+                        prices[itype] = usd
+    return prices
+
+
+def get_price_map():
+    """Returns the hourly price map, refreshed from disk or the Pricing API at most once a day."""
+    now = time.time()
+    with price_cache_lock:
+        if price_cache["prices"] and now - price_cache["loaded_at"] < PRICE_CACHE_TTL:
+            return price_cache["prices"]
+
+        prices, loaded_at = None, now
+        try:
+            mtime = os.stat(PRICE_CACHE_PATH).st_mtime
+            if now - mtime < PRICE_CACHE_TTL:
+                with open(PRICE_CACHE_PATH) as f:
+                    cached = json.load(f)
+                if isinstance(cached, dict) and all(isinstance(v, float) for v in cached.values()):
+                    prices, loaded_at = cached, mtime
+        except (OSError, ValueError):
+            pass
+
+        if not prices:
+            try:
+                prices = fetch_on_demand_prices()
+            except Exception as e:
+                logger.warning("Could not fetch EC2 prices, using the static map: %s", e)
+                loaded_at = now - PRICE_CACHE_TTL + PRICE_RETRY_AFTER
+            if prices:
+                try:
+                    # Write a fresh temp file and rename it over the cache, so an existing symlink
+                    # at the path is replaced rather than followed, and readers never see a partial file.
+                    cache_dir = os.path.dirname(PRICE_CACHE_PATH)
+                    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+                    with tempfile.NamedTemporaryFile("w", dir=cache_dir, delete=False) as f:
+                        json.dump(prices, f)
+                    os.replace(f.name, PRICE_CACHE_PATH)
+                except OSError as e:
+                    logger.warning("Could not write price cache: %s", e)
+
+        price_cache.update(prices={**INSTANCE_PRICE_MAP, **(prices or {})}, loaded_at=loaded_at)
+        return price_cache["prices"]
+
+
+# --- Instance Lookup Helpers ---
+def iter_instances(filters=None, instance_ids=None):
+    """Yields every matching instance, following DescribeInstances pagination."""
+    kwargs = {}
+    if filters:
+        kwargs["Filters"] = filters
+    if instance_ids:
+        kwargs["InstanceIds"] = list(instance_ids)
+    else:
+        # Page size (MaxResults) can't be combined with InstanceIds.
+        kwargs["PaginationConfig"] = {"PageSize": 1000}
+    for page in get_ec2().get_paginator("describe_instances").paginate(**kwargs):
+        for r in page.get("Reservations", []):
+            yield from r["Instances"]
+
+
+def tag_dict(instance):
+    """Maps an instance's tags to a dict once, so several keys can be read without rescanning."""
+    return {t["Key"]: t["Value"] for t in instance.get("Tags") or ()}
+
+
+# --- DescribeInstances Cache ---
+# /list, /cost and the daily report all read this one filter set (narrowing locally) so that
+# back-to-back commands share a single cached response.
+ACTIVE_INSTANCES_FILTER = [{"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]}]
+DESCRIBE_CACHE_TTL = int(os.getenv("DESCRIBE_CACHE_TTL", "30"))  # Seconds a response may be reused
+describe_cache = {}  # key -> (expires_at, instances)
+describe_cache_lock = threading.Lock()
+
+
+def describe_instances_cached(filters=None, instance_ids=None):
+    """Returns a flat list of instances, reusing a recent DescribeInstances response when possible."""
+    key = (
+        tuple((f["Name"], tuple(f["Values"])) for f in filters or ()),
+        frozenset(instance_ids or ()),
+    )
+    now = time.monotonic()
+    with describe_cache_lock:
+        hit = describe_cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+
+    instances = list(iter_instances(filters=filters, instance_ids=instance_ids))
+
+    with describe_cache_lock:
+        # Drop expired entries so arbitrary /list tags can't grow the cache forever.
+        for k in [k for k, (expires_at, _) in describe_cache.items() if expires_at <= now]:
+            del describe_cache[k]
+        describe_cache[key] = (now + DESCRIBE_CACHE_TTL, instances)
+    return instances
+
+
+def find_cached_instance(iid):
+    """Returns an instance from any live cached response (e.g. a recent /list), or None."""
+    now = time.monotonic()
+    with describe_cache_lock:
+        for expires_at, instances in describe_cache.values():
+            if expires_at > now:
+                for i in instances:
+                    if i["InstanceId"] == iid:
+                        return i
+    return None
+
+
+def invalidate_describe_cache():
+    with describe_cache_lock:
+        describe_cache.clear()
+
+
+# --- Button State Hints ---
+# /list encodes each instance's state into its Start/Stop buttons so no-op presses can be answered
+# locally. A hint is trusted only while it is younger than the describe cache and newer than the
+# last state change this bot made to that instance.
+NOOP_STATES = {"start": {"pending", "running"}, "stop": {"stopping", "stopped"}}
+state_changed_at = {}  # iid -> time.time() of the bot's last start/stop/reboot/terminate
+
+
+def known_state(message, iid, state_hint):
+    """Returns the instance state without calling EC2, or None if nothing recent is known."""
+    sent_at = message.date.timestamp()
+    if state_hint and time.time() - sent_at < DESCRIBE_CACHE_TTL and sent_at > state_changed_at.get(iid, 0):
+        return state_hint
+    cached = find_cached_instance(iid)
+    return cached["State"]["Name"] if cached else None
+
+
+def record_state_change(iid):
+    state_changed_at[iid] = time.time()
+    invalidate_describe_cache()
+
 
 # --- Helper function to escape MarkdownV2 characters ---
+MARKDOWN_ESCAPE_TABLE = str.maketrans({c: '\\' + c for c in r'_*[]()~`>#+-=|{}.!'})
+
+
 def escape_markdown(text: str) -> str:
     """Escapes all special characters for Telegram MarkdownV2."""
     if not isinstance(text, str):
         text = str(text)
-    escape_chars = r'_*[]()~`>#+-=|{}.!'
-    return re.sub(f'([{re.escape(escape_chars)}])', r'\\\1', text)
+    return text.translate(MARKDOWN_ESCAPE_TABLE)
+
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def split_message(text, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Splits text into chunks Telegram will accept, breaking after a newline or a ", " separator.
+
+    Both boundaries sit between complete escaped values, so MarkdownV2 entities are never cut in half.
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = max(text.rfind("\n", 0, limit) + 1, text.rfind(", ", 0, limit - 1) + 2)
+        if cut <= 2:
+            cut = limit
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:]
+    chunks.append(text)
+    return chunks
+
+
+@lru_cache(maxsize=1024)
+def cost_row_suffix(itype, cost):
+    """Escaped "(type): $price/hr" tail of a /cost row, built once per instance type and price."""
+    return f"\\({escape_markdown(itype)}\\): `${escape_markdown(f'{cost}')}/hr`"
+
+
+# --- Public IP Lookup (for Security Group rules) ---
+PUBLIC_IP_TTL = 300  # Seconds; the host's public IP rarely changes within a session
+public_ip_cache = {"ip": None, "expires_at": 0.0}
+
+
+# One keep-alive session so even cache misses skip the TCP + TLS handshake. requests is imported
+# here rather than at module level since only the admin SG commands need it.
+@cache
+def get_http_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=1))
+    return session
+
+
+def get_public_ip():
+    now = time.monotonic()
+    if public_ip_cache["ip"] and now < public_ip_cache["expires_at"]:
+        return public_ip_cache["ip"]
+    resp = get_http_session().get("https://api.ipify.org", timeout=5)
+    resp.raise_for_status()
+    ip = resp.text.strip()
+    public_ip_cache.update(ip=ip, expires_at=now + PUBLIC_IP_TTL)
+    return ip
 
 
 # --- Load Token ---
+TOKEN_CACHE_PATH = os.getenv("BOT_TOKEN_CACHE")  # Opt-in, e.g. /run/aws-bot/token (tmpfs)
+TOKEN_CACHE_TTL = 3600  # Seconds before the cached token is re-fetched from SSM
+
+
 def get_bot_token():
+    # A fresh on-disk copy lets quick restarts skip the SSM + KMS decrypt round-trip.
+    if TOKEN_CACHE_PATH:
+        try:
+            if time.time() - os.stat(TOKEN_CACHE_PATH).st_mtime < TOKEN_CACHE_TTL:
+                with open(TOKEN_CACHE_PATH) as f:
+                    return f.read().strip()
+        except OSError:
+            pass
+
     try:
-        resp = ssm.get_parameter(Name="/telegram/bot_token", WithDecryption=True)
-        return resp["Parameter"]["Value"]
+        resp = get_ssm().get_parameter(Name="/telegram/bot_token", WithDecryption=True)
+        token = resp["Parameter"]["Value"]
     except Exception as e:
         logger.error("Could not retrieve bot token: %s", e)
         exit()
 
+    if TOKEN_CACHE_PATH:
+        try:
+            fd = os.open(TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(token)
+        except OSError as e:
+            logger.warning("Could not cache bot token: %s", e)
+    return token
 
-TOKEN = get_bot_token()
 
 # --- Auth & RBAC ---
-ADMIN_USERS = [ADMIN_CHAT_ID]  # Full access
-STANDARD_USERS = []  # Can list, start, stop
-INSTANCE_RE = re.compile(r"^i-[0-9a-fA-F]{8,17}$")
-EIP_ALLOC_RE = re.compile(r"^eipalloc-[0-9a-fA-F]{8,17}$")
-SG_RE = re.compile(r"^sg-[0-9a-fA-F]{8,17}$")
+ADMIN_USERS = frozenset({ADMIN_CHAT_ID})  # Full access
+STANDARD_USERS = frozenset()  # Can list, start, stop
+AUTHORIZED_USERS = ADMIN_USERS | STANDARD_USERS
+HEX_CHARS = frozenset("0123456789abcdefABCDEF")
+
+
+def is_aws_id(s: str, prefix: str) -> bool:
+    """Checks for `prefix` followed by 8-17 hex characters (e.g. `i-`, `sg-`, `eipalloc-` IDs), without a regex."""
+    return s.startswith(prefix) and 8 <= len(s) - len(prefix) <= 17 and HEX_CHARS.issuperset(s[len(prefix):])
 
 
 def user_authorized(func):
     @wraps(func)
     def wrapped(update, context, *args, **kwargs):
         user_id = update.effective_user.id
-        if user_id in ADMIN_USERS or user_id in STANDARD_USERS:
+        if user_id in AUTHORIZED_USERS:
             return func(update, context, *args, **kwargs)
         update.message.reply_text("Unauthorized.")
         return
@@ -79,19 +376,135 @@ def admin_only(func):
 
 
 # --- Audit Logging ---
+# Entries are queued and written by a background thread in BatchWriteItem-sized chunks,
+# so handlers never wait on a DynamoDB round-trip.
+AUDIT_BATCH_SIZE = 25  # BatchWriteItem limit
+AUDIT_FLUSH_INTERVAL = 0.2  # Seconds to wait for more entries before writing a partial batch
+audit_queue = queue.Queue()
+
+
 def log_action(user_id, command, details=""):
-    try:
-        audit_log_table.put_item(
-            Item={
-                "LogID": str(uuid.uuid4()),
-                "Timestamp": str(datetime.datetime.now(pytz.utc)),
-                "UserID": str(user_id),
-                "Command": command,
-                "Details": details,
-            }
-        )
-    except Exception as e:
-        logger.error("Failed to write to audit log: %s", e)
+    import uuid  # Deferred to the first audit entry; later calls hit the sys.modules cache
+
+    audit_queue.put_nowait({
+        "LogID": uuid.uuid4().hex,
+        "Timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds"),
+        "UserID": str(user_id),
+        "Command": command,
+        "Details": details,
+    })
+
+
+def audit_writer():
+    """Drains audit_queue into DynamoDB until it reads the None sentinel."""
+    while True:
+        batch = [audit_queue.get()]
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+        while len(batch) < AUDIT_BATCH_SIZE and batch[-1] is not None:
+            try:
+                batch.append(audit_queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+
+        items = [item for item in batch if item is not None]
+        if items:
+            try:
+                # batch_writer issues BatchWriteItem and retries any UnprocessedItems.
+                with get_audit_log_table().batch_writer(overwrite_by_pkeys=["LogID"]) as writer:
+                    for item in items:
+                        writer.put_item(Item=item)
+            except Exception as e:
+                logger.error("Failed to write %d audit log entries: %s", len(items), e)
+
+        if batch[-1] is None:
+            return
+
+
+def stop_audit_writer(thread):
+    """Flushes whatever is still queued, then lets the writer thread exit."""
+    audit_queue.put(None)
+    thread.join(timeout=10)
+
+
+# --- Static Replies & Keyboards (built once at import) ---
+WELCOME_TEXT = (
+    "👋 Welcome to your AWS Manager Bot!\n\n"
+    "Use /help to see all available commands."
+)
+
+# Already MarkdownV2-escaped by hand, so it is sent as-is.
+HELP_TEXT = (
+    "📌 *Available Commands:*\n\n"
+    "`/list` – List all EC2 instances\n"
+    "`/list <tag>` – Filter by `Environment` tag \\(e\\.g\\., `/list dev`\\)\n"
+    "`/list name=<name>` – Filter by `Name` tag \\(wildcards like `web*` work\\)\n"
+    "`/describe <id>` – Show instance details\n"
+    "`/cost` – Estimate current running costs\n\n"
+    "*Admin Commands:*\n"
+    "`/allocate_eip` – Allocate a new Elastic IP\n"
+    "`/associate_eip <alloc_id> <inst_id>` – Associate EIP\n"
+    "`/release_eip <alloc_id>` – Release an EIP\n"
+    "`/add_ip <sg_id> <port> [direction]` – Add your IP to a Security Group\n"
+    "`/remove_ip <sg_id> <port> [direction]` – Remove your IP from a SG\n"
+)
+BOT_COMMANDS = [
+    BotCommand("start", "▶️ Start the bot"),
+    BotCommand("help", "❓ Show help"),
+    BotCommand("list", "📜 List EC2 instances"),
+    BotCommand("describe", "ℹ️ Get instance details"),
+    BotCommand("cost", "💰 Estimate running costs"),
+    BotCommand("allocate_eip", "➕ Allocate EIP (Admin)"),
+    BotCommand("associate_eip", "↔️ Associate EIP (Admin)"),
+    BotCommand("release_eip", "➖ Release EIP (Admin)"),
+    BotCommand("add_ip", "🔒 Add IP to SG (Admin)"),
+    BotCommand("remove_ip", "🔓 Remove IP from SG (Admin)"),
+]
+
+# Message templates: literal MarkdownV2 is pre-escaped, every field must be escaped by the caller.
+DESCRIBE_TEMPLATE = (
+    "*Instance Details:*\n\n"
+    "📛 *Name:* {name}\n"
+    "🆔 *ID:* `{iid}`\n"
+    "📦 *Type:* `{itype}`\n"
+    "🌍 *AZ:* `{az}`\n"
+    "⚡ *State:* `{state}`\n"
+    "🌐 *Public IP:* `{public_ip}`\n"
+    "🔒 *Private IP:* `{private_ip}`\n"
+    "🛡 *SGs:* `{sgs}`\n"
+    "⏱ *Launch Time:* `{launch_time}`"
+)
+COST_TEMPLATE = (
+    "*Estimated EC2 Running Costs:*\n\n"
+    "*Hourly:* `${hourly}`\n"
+    "*Daily:* `${daily}`\n"
+    "*Monthly:* `${monthly}`\n\n"
+    "*Running Instances:*\n{instances}"
+)
+DAILY_REPORT_TEMPLATE = (
+    "☀️ *AWS Daily Report*\n\n"
+    "🟢 *Running \\({running_count}\\):*\n{running}\n\n"
+    "🔴 *Stopped \\({stopped_count}\\):*\n{stopped}\n\n"
+    "💰 *Est\\. Daily Cost:* `${daily_cost}`"
+)
+
+CANCEL_BUTTON = InlineKeyboardButton("Cancel", callback_data="cancel:")
+
+# Button actions that map straight onto an EC2 call: action -> (client method, reply prefix)
+INSTANCE_ACTIONS = {
+    "start": ("start_instances", "🟢 Start initiated for"),
+    "stop": ("stop_instances", "🔴 Stop initiated for"),
+    "reboot": ("reboot_instances", "🔄 Reboot initiated for"),
+}
+
+
+def instance_keyboard_rows(iid, state, label):
+    """The two /list keyboard rows for one instance; Start/Stop carry the state hint."""
+    return (
+        (InlineKeyboardButton(f"🟢 Start {label}", callback_data=f"start:{iid}:{state}"),
+         InlineKeyboardButton(f"🔴 Stop {label}", callback_data=f"stop:{iid}:{state}")),
+        (InlineKeyboardButton(f"🔄 Reboot {label}", callback_data=f"reboot:{iid}"),
+         InlineKeyboardButton(f"💥 Terminate {label}", callback_data=f"terminate_confirm1:{iid}")),
+    )
 
 
 # --- Command Handlers ---
@@ -99,29 +512,13 @@ def log_action(user_id, command, details=""):
 @user_authorized
 def start(update, context):
     log_action(update.effective_user.id, "/start")
-    update.message.reply_text(
-        "👋 Welcome to your AWS Manager Bot!\n\n"
-        "Use /help to see all available commands."
-    )
+    update.message.reply_text(WELCOME_TEXT, disable_web_page_preview=True)
 
 
 @user_authorized
 def help_command(update, context):
     log_action(update.effective_user.id, "/help")
-    commands = (
-        "📌 *Available Commands:*\n\n"
-        "`/list` – List all EC2 instances\n"
-        "`/list <tag>` – Filter by `Environment` tag \(e\.g\., `/list dev`\)\n"
-        "`/describe <id>` – Show instance details\n"
-        "`/cost` – Estimate current running costs\n\n"
-        "*Admin Commands:*\n"
-        "`/allocate_eip` – Allocate a new Elastic IP\n"
-        "`/associate_eip <alloc_id> <inst_id>` – Associate EIP\n"
-        "`/release_eip <alloc_id>` – Release an EIP\n"
-        "`/add_ip <sg_id> <port> [direction]` – Add your IP to a Security Group\n"
-        "`/remove_ip <sg_id> <port> [direction]` – Remove your IP from a SG\n"
-    )
-    update.message.reply_text(commands, parse_mode=ParseMode.MARKDOWN_V2)
+    update.message.reply_text(HELP_TEXT, parse_mode=ParseMode.MARKDOWN_V2, disable_web_page_preview=True)
 
 
 @user_authorized
@@ -131,36 +528,35 @@ def list_instances(update, context):
     log_action(user_id, "/list", f"Tag: {tag_filter}")
 
     try:
-        filters = [{"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]}]
-        if tag_filter:
+        # Narrow server-side so EC2 only returns matching instances: `name=<value>` matches the
+        # Name tag, anything else the Environment tag.
+        filters = list(ACTIVE_INSTANCES_FILTER)
+        if tag_filter and tag_filter.lower().startswith("name="):
+            filters.append({"Name": "tag:Name", "Values": [tag_filter[len("name="):]]})
+        elif tag_filter:
             filters.append({"Name": "tag:Environment", "Values": [tag_filter]})
 
-        resp = ec2.describe_instances(Filters=filters)
-        instances_found = False
-        for r in resp.get("Reservations", []):
-            for i in r["Instances"]:
-                instances_found = True
-                iid = i["InstanceId"]
-                state = i["State"]["Name"]
-                name = next((t["Value"] for t in i.get("Tags", []) if t["Key"] == "Name"), "-")
-
-                keyboard = InlineKeyboardMarkup([
-                    [
-                        InlineKeyboardButton("🟢 Start", callback_data=f"start:{iid}"),
-                        InlineKeyboardButton("🔴 Stop", callback_data=f"stop:{iid}")
-                    ],
-                    [
-                        InlineKeyboardButton("🔄 Reboot", callback_data=f"reboot:{iid}"),
-                        InlineKeyboardButton("💥 Terminate", callback_data=f"terminate_confirm1:{iid}")
-                    ]
-                ])
-                # Send the message as plain text to guarantee it never fails.
-                msg = f"Name: {name}\nID: {iid}\nState: {state}"
-                update.message.reply_text(msg, reply_markup=keyboard)
-
-        if not instances_found:
-            update.message.reply_text(
+        # First pass: pull out just the fields the reply needs.
+        records = [
+            (i["InstanceId"], i["State"]["Name"], tag_dict(i).get("Name", "-"))
+            for i in describe_instances_cached(filters=filters)
+        ]
+        if not records:
+            return update.message.reply_text(
                 f"No instances found with tag '{tag_filter}'." if tag_filter else "No running or stopped instances found.")
+
+        # Second pass: one message per LIST_CHUNK_SIZE instances instead of one per instance. Name tags
+        # are capped at 256 chars by AWS, so a chunk always stays under Telegram's 4096-char limit.
+        for offset in range(0, len(records), LIST_CHUNK_SIZE):
+            chunk = records[offset:offset + LIST_CHUNK_SIZE]
+            lines = [f"{STATE_EMOJI.get(state, '⚪')} {name} ({iid}) – {state}" for iid, state, name in chunk]
+            buttons = [
+                row
+                for iid, state, name in chunk
+                for row in instance_keyboard_rows(iid, state, name if name != "-" else iid)
+            ]
+            # Send the message as plain text to guarantee it never fails.
+            update.message.reply_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(buttons))
     except Exception as e:
         logger.error("Error in /list: %s", e)
         # Send errors as plain text to avoid parsing issues.
@@ -171,29 +567,26 @@ def list_instances(update, context):
 @user_authorized
 def describe_instance(update, context):
     user_id = update.effective_user.id
-    if len(context.args) != 1 or not INSTANCE_RE.match(context.args[0]):
+    if len(context.args) != 1 or not is_aws_id(context.args[0], "i-"):
         return update.message.reply_text("Usage: `/describe <instance-id>`", parse_mode=ParseMode.MARKDOWN_V2)
 
     iid = context.args[0]
     log_action(user_id, "/describe", iid)
     try:
-        resp = ec2.describe_instances(InstanceIds=[iid])
-        i = resp["Reservations"][0]["Instances"][0]
+        i = find_cached_instance(iid) or describe_instances_cached(instance_ids=[iid])[0]
 
         sg_details = [f"{sg['GroupName']} ({sg['GroupId']})" for sg in i.get('SecurityGroups', [])]
 
-        name = escape_markdown(next((t["Value"] for t in i.get("Tags", []) if t["Key"] == "Name"), "-"))
-        details = (
-            f"*Instance Details:*\n\n"
-            f"📛 *Name:* {name}\n"
-            f"🆔 *ID:* `{escape_markdown(i['InstanceId'])}`\n"
-            f"📦 *Type:* `{escape_markdown(i['InstanceType'])}`\n"
-            f"🌍 *AZ:* `{escape_markdown(i['Placement']['AvailabilityZone'])}`\n"
-            f"⚡ *State:* `{escape_markdown(i['State']['Name'])}`\n"
-            f"🌐 *Public IP:* `{escape_markdown(i.get('PublicIpAddress', '-'))}`\n"
-            f"🔒 *Private IP:* `{escape_markdown(i.get('PrivateIpAddress', '-'))}`\n"
-            f"🛡 *SGs:* `{escape_markdown(', '.join(sg_details))}`\n"
-            f"⏱ *Launch Time:* `{escape_markdown(i['LaunchTime'].strftime('%Y-%m-%d %H:%M'))}`"
+        details = DESCRIBE_TEMPLATE.format(
+            name=escape_markdown(tag_dict(i).get("Name", "-")),
+            iid=escape_markdown(i['InstanceId']),
+            itype=escape_markdown(i['InstanceType']),
+            az=escape_markdown(i['Placement']['AvailabilityZone']),
+            state=escape_markdown(i['State']['Name']),
+            public_ip=escape_markdown(i.get('PublicIpAddress', '-')),
+            private_ip=escape_markdown(i.get('PrivateIpAddress', '-')),
+            sgs=escape_markdown(', '.join(sg_details)),
+            launch_time=escape_markdown(i['LaunchTime'].strftime('%Y-%m-%d %H:%M')),
         )
         update.message.reply_text(details, parse_mode=ParseMode.MARKDOWN_V2)
     except Exception as e:
@@ -204,28 +597,25 @@ def describe_instance(update, context):
 def cost_command(update, context):
     log_action(update.effective_user.id, "/cost")
     try:
-        resp = ec2.describe_instances(Filters=[{"Name": "instance-state-name", "Values": ["running"]}])
-        total_cost = 0
-        instance_details = []
-        for r in resp.get("Reservations", []):
-            for i in r["Instances"]:
-                itype = i['InstanceType']
-                cost = INSTANCE_PRICE_MAP.get(itype, 0)
-                total_cost += cost
-
-                escaped_id = escape_markdown(i['InstanceId'])
-                escaped_type = escape_markdown(itype)
-                escaped_cost = escape_markdown(f"{cost}")
-                instance_details.append(f"`{escaped_id}` \({escaped_type}\): `${escaped_cost}/hr`")
+        price = get_price_map().get
+        running = [
+            (i['InstanceId'], i['InstanceType'])
+            for i in describe_instances_cached(filters=ACTIVE_INSTANCES_FILTER)
+            if i['State']['Name'] == 'running'
+        ]
+        costs = [price(itype, 0) for _, itype in running]
+        total_cost = sum(costs)
+        instance_details = [
+            f"`{escape_markdown(iid)}` {cost_row_suffix(itype, cost)}" for (iid, itype), cost in zip(running, costs)
+        ]
 
         hourly, daily, monthly = total_cost, total_cost * 24, total_cost * 24 * 30
 
-        msg = (
-                f"*Estimated EC2 Running Costs:*\n\n"
-                f"*Hourly:* `${escape_markdown(f'{hourly:.4f}')}`\n"
-                f"*Daily:* `${escape_markdown(f'{daily:.2f}')}`\n"
-                f"*Monthly:* `${escape_markdown(f'{monthly:.2f}')}`\n\n"
-                f"*Running Instances:*\n" + ("\n".join(instance_details) if instance_details else "None")
+        msg = COST_TEMPLATE.format(
+            hourly=escape_markdown(f'{hourly:.4f}'),
+            daily=escape_markdown(f'{daily:.2f}'),
+            monthly=escape_markdown(f'{monthly:.2f}'),
+            instances="\n".join(instance_details) if instance_details else "None",
         )
         update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN_V2)
     except Exception as e:
@@ -237,7 +627,7 @@ def cost_command(update, context):
 def allocate_eip(update, context):
     log_action(update.effective_user.id, "/allocate_eip")
     try:
-        resp = ec2.allocate_address(Domain='vpc')
+        resp = get_ec2().allocate_address(Domain='vpc')
         ip = escape_markdown(resp['PublicIp'])
         alloc_id = escape_markdown(resp['AllocationId'])
         update.message.reply_text(f"✅ EIP Allocated\n*IP:* `{ip}`\n*Allocation ID:* `{alloc_id}`",
@@ -248,14 +638,15 @@ def allocate_eip(update, context):
 
 @admin_only
 def associate_eip(update, context):
-    if len(context.args) != 2 or not EIP_ALLOC_RE.match(context.args[0]) or not INSTANCE_RE.match(context.args[1]):
+    if len(context.args) != 2 or not is_aws_id(context.args[0], "eipalloc-") or not is_aws_id(context.args[1], "i-"):
         return update.message.reply_text("Usage: `/associate_eip <allocation-id> <instance-id>`",
                                          parse_mode=ParseMode.MARKDOWN_V2)
 
     alloc_id, iid = context.args
     log_action(update.effective_user.id, "/associate_eip", f"{alloc_id} -> {iid}")
     try:
-        ec2.associate_address(AllocationId=alloc_id, InstanceId=iid)
+        get_ec2().associate_address(AllocationId=alloc_id, InstanceId=iid)
+        invalidate_describe_cache()  # The instance's public IP just changed
         update.message.reply_text(
             f"✅ EIP `{escape_markdown(alloc_id)}` associated with instance `{escape_markdown(iid)}`",
             parse_mode=ParseMode.MARKDOWN_V2)
@@ -265,220 +656,232 @@ def associate_eip(update, context):
 
 @admin_only
 def release_eip(update, context):
-    if len(context.args) != 1 or not EIP_ALLOC_RE.match(context.args[0]):
+    if len(context.args) != 1 or not is_aws_id(context.args[0], "eipalloc-"):
         return update.message.reply_text("Usage: `/release_eip <allocation-id>`", parse_mode=ParseMode.MARKDOWN_V2)
 
     alloc_id = context.args[0]
     log_action(update.effective_user.id, "/release_eip", alloc_id)
     try:
-        ec2.release_address(AllocationId=alloc_id)
+        get_ec2().release_address(AllocationId=alloc_id)
+        invalidate_describe_cache()  # Releasing may have detached a public IP from an instance
         update.message.reply_text(f"✅ EIP `{escape_markdown(alloc_id)}` released.", parse_mode=ParseMode.MARKDOWN_V2)
     except Exception as e:
         update.message.reply_text(f"Error: {str(e)}")
 
 
-@admin_only
-def add_ip_to_sg(update, context):
-    # Usage: /add_ip <sg-id> <port> [inbound|outbound]
-    if not (2 <= len(context.args) <= 3) or not SG_RE.match(context.args[0]):
-        return update.message.reply_text("Usage: `/add_ip <sg-id> <port> [inbound|outbound]`",
+# /add_ip and /remove_ip: action -> (past-tense verb, preposition, EC2 method per direction)
+SG_RULE_ACTIONS = {
+    "add": ("Added", "to", {"inbound": "authorize_security_group_ingress",
+                            "outbound": "authorize_security_group_egress"}),
+    "remove": ("Removed", "from", {"inbound": "revoke_security_group_ingress",
+                                   "outbound": "revoke_security_group_egress"}),
+}
+
+
+def tcp_permission(port, cidr, description=None):
+    """IpPermissions for a single TCP port opened to one CIDR."""
+    ip_range = {'CidrIp': cidr}
+    if description:
+        ip_range['Description'] = description
+    return [{'IpProtocol': 'tcp', 'FromPort': port, 'ToPort': port, 'IpRanges': [ip_range]}]
+
+
+def modify_sg_rule(update, context, action):
+    # Usage: /<action>_ip <sg-id> <port> [inbound|outbound]
+    # The port is validated up front so bad input never costs an ipify or EC2 round-trip.
+    args = context.args
+    if (not (2 <= len(args) <= 3) or not is_aws_id(args[0], "sg-")
+            or not args[1].isdecimal() or not 0 < int(args[1]) < 65536):
+        return update.message.reply_text(f"Usage: `/{action}_ip <sg-id> <port> [inbound|outbound]`",
                                          parse_mode=ParseMode.MARKDOWN_V2)
 
-    sg_id, port = context.args[0], context.args[1]
-    direction = 'inbound'
-    if len(context.args) == 3 and context.args[2].lower() == 'outbound':
-        direction = 'outbound'
+    verb, preposition, methods = SG_RULE_ACTIONS[action]
+    sg_id, port = args[0], int(args[1])
+    direction = 'outbound' if len(args) == 3 and args[2].lower() == 'outbound' else 'inbound'
 
-    log_action(update.effective_user.id, f"/add_ip ({direction})", f"{sg_id}:{port}")
+    user_id = update.effective_user.id
+    log_action(user_id, f"/{action}_ip ({direction})", f"{sg_id}:{port}")
 
     try:
         # Perform all actions *before* sending a reply
-        ip = requests.get('https://api.ipify.org').text
-        ip_permission = {
-            'IpProtocol': 'tcp',
-            'FromPort': int(port),
-            'ToPort': int(port),
-            'IpRanges': [{
-                'CidrIp': f'{ip}/32',
-                'Description': f'Added by TelegramBot for user {update.effective_user.id} on {datetime.date.today().isoformat()}'
-            }]
-        }
-
-        if direction == 'inbound':
-            ec2.authorize_security_group_ingress(GroupId=sg_id, IpPermissions=[ip_permission])
-        else:  # outbound
-            ec2.authorize_security_group_egress(GroupId=sg_id, IpPermissions=[ip_permission])
+        ip = get_public_ip()
+        description = None
+        if action == "add":
+            description = f'Added by TelegramBot for user {user_id} on {datetime.date.today().isoformat()}'
+
+        permissions = tcp_permission(port, f'{ip}/32', description)
+        getattr(get_ec2(), methods[direction])(GroupId=sg_id, IpPermissions=permissions)
 
         # If we reach here, it was successful. Send one clear success message.
         success_message = (
-            f"✅ *Rule Added Successfully*\n\n"
-            f"Added `{escape_markdown(ip)}/32` to `{escape_markdown(sg_id)}`\n"
-            f"on port `{escape_markdown(port)}` for `{direction}` traffic\."
+            f"✅ *Rule {verb} Successfully*\n\n"
+            f"{verb} `{escape_markdown(ip)}/32` {preposition} `{escape_markdown(sg_id)}`\n"
+            f"on port `{port}` for `{direction}` traffic\\."
         )
         update.message.reply_text(success_message, parse_mode=ParseMode.MARKDOWN_V2)
 
     except Exception as e:
-        logger.error("Error in /add_ip for user %s: %s", update.effective_user.id, e)
+        logger.error("Error in /%s_ip for user %s: %s", action, user_id, e)
         # If anything failed, send one clear, plain-text error message.
         error_message = f"❌ An error occurred:\n\n{str(e)}"
         update.message.reply_text(error_message)
 
 
 @admin_only
-def remove_ip_from_sg(update, context):
-    # Usage: /remove_ip <sg-id> <port> [inbound|outbound]
-    if not (2 <= len(context.args) <= 3) or not SG_RE.match(context.args[0]):
-        return update.message.reply_text("Usage: `/remove_ip <sg-id> <port> [inbound|outbound]`",
-                                         parse_mode=ParseMode.MARKDOWN_V2)
-
-    sg_id, port = context.args[0], context.args[1]
-    direction = 'inbound'
-    if len(context.args) == 3 and context.args[2].lower() == 'outbound':
-        direction = 'outbound'
+def add_ip_to_sg(update, context):
+    modify_sg_rule(update, context, "add")
 
-    log_action(update.effective_user.id, f"/remove_ip ({direction})", f"{sg_id}:{port}")
 
-    try:
-        # Perform all actions *before* sending a reply
-        ip = requests.get('https://api.ipify.org').text
-        ip_permission = {
-            'IpProtocol': 'tcp',
-            'FromPort': int(port),
-            'ToPort': int(port),
-            'IpRanges': [{'CidrIp': f'{ip}/32'}]
-        }
-
-        if direction == 'inbound':
-            ec2.revoke_security_group_ingress(GroupId=sg_id, IpPermissions=[ip_permission])
-        else:  # outbound
-            ec2.revoke_security_group_egress(GroupId=sg_id, IpPermissions=[ip_permission])
-
-        # If we reach here, it was successful.
-        success_message = (
-            f"✅ *Rule Removed Successfully*\n\n"
-            f"Removed `{escape_markdown(ip)}/32` from `{escape_markdown(sg_id)}`\n"
-            f"on port `{escape_markdown(port)}` for `{direction}` traffic\."
-        )
-        update.message.reply_text(success_message, parse_mode=ParseMode.MARKDOWN_V2)
-
-    except Exception as e:
-        logger.error("Error in /remove_ip for user %s: %s", update.effective_user.id, e)
-        # If anything failed, send one clear, plain-text error message.
-        error_message = f"❌ An error occurred:\n\n{str(e)}"
-        update.message.reply_text(error_message)
+@admin_only
+def remove_ip_from_sg(update, context):
+    modify_sg_rule(update, context, "remove")
 
 
-@user_authorized
+# Not wrapped in @user_authorized: that decorator replies via update.message, which is None for
+# button presses, so the check is done here against the callback's own message.
 def handle_callback(update, context):
     query = update.callback_query
-    query.answer()
     user = query.from_user
 
-    if not (user.id in ADMIN_USERS or user.id in STANDARD_USERS):
-        return query.edit_message_text("Unauthorized.")
+    if user.id not in AUTHORIZED_USERS:
+        # A popup only the presser sees; editing would wipe the admin's /list message.
+        return query.answer("Unauthorized.", show_alert=True)
+    query.answer()
 
-    action, data = query.data.split(":", 1)
-    iid = data
+    # /list messages hold buttons for several instances, so results are sent as new replies rather
+    # than edits; only the standalone terminate prompt gets edited in place.
+    action, _, target = query.data.partition(":")
+    iid, _, state_hint = target.partition(":")
     log_action(user.id, f"callback:{action}", iid)
 
     try:
         escaped_iid = escape_markdown(iid)
-        if action == "start":
-            ec2.start_instances(InstanceIds=[iid])
-            query.edit_message_text(f"🟢 Start initiated for `{escaped_iid}`", parse_mode=ParseMode.MARKDOWN_V2)
-        elif action == "stop":
-            ec2.stop_instances(InstanceIds=[iid])
-            query.edit_message_text(f"🔴 Stop initiated for `{escaped_iid}`", parse_mode=ParseMode.MARKDOWN_V2)
-        elif action == "reboot":
-            ec2.reboot_instances(InstanceIds=[iid])
-            query.edit_message_text(f"🔄 Reboot initiated for `{escaped_iid}`", parse_mode=ParseMode.MARKDOWN_V2)
+        if action in INSTANCE_ACTIONS:
+            state = known_state(query.message, iid, state_hint)
+            if state in NOOP_STATES.get(action, ()):
+                return query.message.reply_text(f"{iid} is already {state}.")
+
+            method, reply = INSTANCE_ACTIONS[action]
+            with ec2_mutation_slots:
+                getattr(get_ec2(), method)(InstanceIds=[iid])
+            record_state_change(iid)
+            query.message.reply_text(f"{reply} `{escaped_iid}`", parse_mode=ParseMode.MARKDOWN_V2)
         elif action == "cancel":
-            query.edit_message_text(query.message.text)  # Revert to the original plain text
+            query.edit_message_text(query.message.text)  # Keep the prompt text, drop its buttons
         elif action in ["terminate_confirm1", "terminate_confirm2"]:
             if user.id not in ADMIN_USERS:
-                return query.edit_message_text("Admin access required to terminate.")
+                return query.message.reply_text("Admin access required to terminate.")
 
             if action == "terminate_confirm1":
                 keyboard = InlineKeyboardMarkup([
                     [InlineKeyboardButton("🚨 YES, I AM SURE", callback_data=f"terminate_confirm2:{iid}")],
-                    [InlineKeyboardButton("Cancel", callback_data=f"cancel:{iid}")]
+                    [CANCEL_BUTTON]
                 ])
-                query.edit_message_text(f"⚠️ ARE YOU ABSOLUTELY SURE you want to terminate {iid}?",
-                                        reply_markup=keyboard)  # Plain text for safety
+                query.message.reply_text(f"⚠️ ARE YOU ABSOLUTELY SURE you want to terminate {iid}?",
+                                         reply_markup=keyboard)  # Plain text for safety
 
             elif action == "terminate_confirm2":
-                ec2.terminate_instances(InstanceIds=[iid])
+                with ec2_mutation_slots:
+                    get_ec2().terminate_instances(InstanceIds=[iid])
+                record_state_change(iid)
                 query.edit_message_text(f"💥 Termination started for `{escaped_iid}`", parse_mode=ParseMode.MARKDOWN_V2)
     except Exception as e:
-        query.edit_message_text(f"Error: {str(e)}")
+        query.message.reply_text(f"Error: {str(e)}")
 
 
 def daily_report(context):
     try:
-        resp = ec2.describe_instances(Filters=[{"Name": "instance-state-name", "Values": ["running", "stopped"]}])
-        running, stopped, total_cost = [], [], 0
-
-        for r in resp.get("Reservations", []):
-            for i in r["Instances"]:
-                name = escape_markdown(
-                    next((t["Value"] for t in i.get("Tags", []) if t["Key"] == "Name"), i['InstanceId']))
-                if i['State']['Name'] == 'running':
-                    running.append(name)
-                    total_cost += INSTANCE_PRICE_MAP.get(i['InstanceType'], 0)
-                else:
-                    stopped.append(name)
+        # The price map and the instance list are independent lookups that can each hit the
+        # network, so they are fetched concurrently.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            prices_future = pool.submit(get_price_map)
+            instances = describe_instances_cached(filters=ACTIVE_INSTANCES_FILTER)
+            price = prices_future.result().get
+
+        items = [
+            (escape_markdown(tag_dict(i).get("Name", i['InstanceId'])), i['State']['Name'] == 'running', i['InstanceType'])
+            for i in instances
+            if i['State']['Name'] in ('running', 'stopped')
+        ]
+        running = [name for name, is_running, _ in items if is_running]
+        stopped = [name for name, is_running, _ in items if not is_running]
+        total_cost = sum(price(itype, 0) for _, is_running, itype in items if is_running)
 
         daily_cost = total_cost * 24
 
-        msg = (
-                f"☀️ *AWS Daily Report*\n\n"
-                f"🟢 *Running \({len(running)}\):*\n" + (', '.join(running) if running else "None") + "\n\n"
-                                                                                                     f"🔴 *Stopped \({len(stopped)}\):*\n" + (
-                    ', '.join(stopped) if stopped else "None") + "\n\n"
-                                                                 f"💰 *Est\. Daily Cost:* `${escape_markdown(f'{daily_cost:.2f}')}`"
+        msg = DAILY_REPORT_TEMPLATE.format(
+            running_count=len(running),
+            running=', '.join(running) if running else "None",
+            stopped_count=len(stopped),
+            stopped=', '.join(stopped) if stopped else "None",
+            daily_cost=escape_markdown(f'{daily_cost:.2f}'),
         )
-        context.bot.send_message(chat_id=ADMIN_CHAT_ID, text=msg, parse_mode=ParseMode.MARKDOWN_V2)
+        for chunk in split_message(msg):
+            context.bot.send_message(chat_id=ADMIN_CHAT_ID, text=chunk, parse_mode=ParseMode.MARKDOWN_V2)
         log_action("SYSTEM", "daily_report", "Report sent successfully")
     except Exception as e:
         logger.error("Failed to send daily report: %s", e)
         log_action("SYSTEM", "daily_report", f"Failed: {e}")
 
 
+def recycle_connection_pools(context):
+    # Drops idle pooled sockets (in-flight requests are unaffected) so half-closed CLOSE_WAIT
+    # connections can't accumulate over weeks of uptime. Relies on botocore internals, hence the guard.
+    for client in (get_ec2(), get_pricing(), get_audit_log_table().meta.client):
+        try:
+            client._endpoint.http_session._manager.clear()
+        except AttributeError as e:
+            logger.warning("Could not recycle connection pool: %s", e)
+
+
 def main():
-    updater = Updater(token=TOKEN, use_context=True)
+    token = get_bot_token()
+    updater = Updater(
+        token=token,
+        use_context=True,
+        workers=DISPATCHER_WORKERS,
+        # One shared keep-alive pool for all outbound Bot API calls (replies, edits, polling).
+        # PTB needs at least workers + 4 connections (the extra ones serve polling and the job queue).
+        request_kwargs={"con_pool_size": max(32, DISPATCHER_WORKERS + 4), "connect_timeout": 5, "read_timeout": 15},
+    )
     dp = updater.dispatcher
 
-    commands = [
-        BotCommand("start", "▶️ Start the bot"),
-        BotCommand("help", "❓ Show help"),
-        BotCommand("list", "📜 List EC2 instances"),
-        BotCommand("describe", "ℹ️ Get instance details"),
-        BotCommand("cost", "💰 Estimate running costs"),
-        BotCommand("allocate_eip", "➕ Allocate EIP (Admin)"),
-        BotCommand("associate_eip", "↔️ Associate EIP (Admin)"),
-        BotCommand("release_eip", "➖ Release EIP (Admin)"),
-        BotCommand("add_ip", "🔒 Add IP to SG (Admin)"),
-        BotCommand("remove_ip", "🔓 Remove IP from SG (Admin)"),
-    ]
-    updater.bot.set_my_commands(commands)
-
-    dp.add_handler(CommandHandler("start", start))
-    dp.add_handler(CommandHandler("help", help_command))
-    dp.add_handler(CommandHandler("list", list_instances))
-    dp.add_handler(CommandHandler("describe", describe_instance))
-    dp.add_handler(CommandHandler("cost", cost_command))
-    dp.add_handler(CommandHandler("allocate_eip", allocate_eip))
-    dp.add_handler(CommandHandler("associate_eip", associate_eip))
-    dp.add_handler(CommandHandler("release_eip", release_eip))
-    dp.add_handler(CommandHandler("add_ip", add_ip_to_sg))
-    dp.add_handler(CommandHandler("remove_ip", remove_ip_from_sg))
-    dp.add_handler(CallbackQueryHandler(handle_callback))
+    updater.bot.set_my_commands(BOT_COMMANDS)
+
+    # run_async hands each update to the dispatcher's worker pool, so a slow AWS call in one chat
+    # doesn't hold up updates from every other chat.
+    dp.add_handler(CommandHandler("start", start, run_async=True))
+    dp.add_handler(CommandHandler("help", help_command, run_async=True))
+    dp.add_handler(CommandHandler("list", list_instances, run_async=True))
+    dp.add_handler(CommandHandler("describe", describe_instance, run_async=True))
+    dp.add_handler(CommandHandler("cost", cost_command, run_async=True))
+    dp.add_handler(CommandHandler("allocate_eip", allocate_eip, run_async=True))
+    dp.add_handler(CommandHandler("associate_eip", associate_eip, run_async=True))
+    dp.add_handler(CommandHandler("release_eip", release_eip, run_async=True))
+    dp.add_handler(CommandHandler("add_ip", add_ip_to_sg, run_async=True))
+    dp.add_handler(CommandHandler("remove_ip", remove_ip_from_sg, run_async=True))
+    dp.add_handler(CallbackQueryHandler(handle_callback, run_async=True))
+
+    # APScheduler 3.6 (pinned by python-telegram-bot 13) only accepts pytz zones, so zoneinfo can't be used.
+    import pytz
 
     jq = updater.job_queue
     jq.run_daily(daily_report, time=datetime.time(hour=9, minute=0, tzinfo=pytz.timezone('Asia/Kolkata')))
+    jq.run_repeating(recycle_connection_pools, interval=POOL_RECYCLE_INTERVAL, first=POOL_RECYCLE_INTERVAL)
+
+    audit_thread = threading.Thread(target=audit_writer, name="audit-writer", daemon=True)
+    audit_thread.start()
+    # atexit also covers exits that skip the normal idle() return, e.g. a startup exception.
+    atexit.register(stop_audit_writer, audit_thread)
 
     logger.info("Bot started successfully!")
-    updater.start_polling()
+    if WEBHOOK_URL:
+        # Telegram pushes each update to us; the token in the path keeps the endpoint unguessable.
+        updater.start_webhook(listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT, url_path=token,
+                              webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{token}", bootstrap_retries=-1)
+    else:
+        # PTB already long-polls; a longer hold than its 10 s default means fewer idle getUpdates calls.
+        updater.start_polling(timeout=POLL_TIMEOUT)
     updater.idle()
 
 